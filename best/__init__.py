@@ -1,24 +1,28 @@
 # flake8: noqa: F401
+import importlib
+import os
 import warnings
 
-import numpy.distutils
-
 # Workaround for theano bug that tries to access blas_opt_info
 # https://github.com/pymc-devs/pymc/issues/5310
-if (
-    hasattr(numpy.distutils, '__config__') and
-    numpy.distutils.__config__ and
-    not hasattr(numpy.distutils.__config__, 'blas_opt_info')
-):
-    import numpy.distutils.system_info  # noqa
+# (Set the environment variable BEST_SKIP_BLAS_WORKAROUND=1 to skip it.)
+if os.environ.get('BEST_SKIP_BLAS_WORKAROUND') != '1':
+    import numpy.distutils
+
+    if (
+        hasattr(numpy.distutils, '__config__') and
+        numpy.distutils.__config__ and
+        not hasattr(numpy.distutils.__config__, 'blas_opt_info')
+    ):
+        import numpy.distutils.system_info  # noqa
 
-    # We need to catch warnings as in some cases NumPy print
-    # stuff that we don't want the user to see.
-    with warnings.catch_warnings(record=True):
-        numpy.distutils.system_info.system_info.verbosity = 0
-        blas_info = numpy.distutils.system_info.get_info('blas_opt')
+        # We need to catch warnings as in some cases NumPy print
+        # stuff that we don't want the user to see.
+        with warnings.catch_warnings(record=True):
+            numpy.distutils.system_info.system_info.verbosity = 0
+            blas_info = numpy.distutils.system_info.get_info('blas_opt')
 
-    numpy.distutils.__config__.blas_opt_info = blas_info
+        numpy.distutils.__config__.blas_opt_info = blas_info
 
 from .model import (analyze_one,
                     analyze_two,
@@ -28,9 +32,24 @@ from .model import (analyze_one,
                     BestResults,
                     BestResultsOne,
                     BestResultsTwo)
-from .plot import (plot_all,
-                   plot_all_one,
-                   plot_all_two,
-                   plot_posterior,
-                   plot_data_and_prediction,
-                   PRETTY_BLUE)
+
+# The plotting module (best.plot) is imported when it or one
+#  of the names it provides is first accessed.
+_PLOT_NAMES = ('plot_all',
+               'plot_all_one',
+               'plot_all_two',
+               'plot_posterior',
+               'plot_data_and_prediction',
+               'PRETTY_BLUE')
+
+
+def __getattr__(name):
+    if name == 'plot':
+        return importlib.import_module('.plot', __name__)
+    if name in _PLOT_NAMES:
+        return getattr(importlib.import_module('.plot', __name__), name)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | {'plot'} | set(_PLOT_NAMES))
@@ -13,13 +13,29 @@ Kruschke, J. (2012) Bayesian estimation supersedes the t
 """
 
 from abc import ABC, abstractmethod
+import inspect
+import os
 import sys
 
 import arviz
 import numpy as np
 import pymc3 as pm
 from pymc3.backends.base import MultiTrace
-import scipy.stats as st
+from pymc3.backends.ndarray import NDArray
+from pymc3.step_methods.hmc import quadpotential
+import theano
+
+
+def _add_nu_prior(nu_min, nu_mean):
+    """Add the normality parameter ν to the model in the current context"""
+    nu = pm.Exponential('nu - %g' % nu_min, float(1 / (nu_mean - nu_min))) + nu_min
+    _ = pm.Deterministic('Normality', nu)
+    return nu
+
+
+def _sd_factor(nu):
+    """Ratio of the standard deviation of a *t* distribution to its scale parameter σ"""
+    return np.sqrt(nu / (nu - 2))
 
 
 class BestModel(ABC):
@@ -55,18 +71,43 @@ class BestModel(ABC):
     def __str__(self):
         pass
 
-    def sample(self, n_samples: int, **kwargs) -> MultiTrace:
+    def sample(self, n_samples: int, backend: str = 'pymc3', **kwargs) -> MultiTrace:
         """Draw posterior samples from the model
 
         (This method is accessible primarily for internal purposes.)
+
+        With ``backend='numpyro'``, the model is compiled to JAX and sampled
+        with the NumPyro implementation of NUTS, which requires the ``jax``
+        and ``numpyro`` packages. This backend accepts only the ``tune``,
+        ``chains``, ``target_accept``, ``random_seed`` and ``progressbar``
+        keyword arguments.
         """
 
         kwargs['tune'] = kwargs.get('tune', 1000)
+
+        if backend == 'numpyro':
+            return self._sample_numpyro(n_samples, **kwargs)
+        elif backend != 'pymc3':
+            raise ValueError("Sampling backend must be 'pymc3' or 'numpyro'")
+
         pm_major, pm_minor, *_ = pm.__version__.split('.')
         if (int(pm_major), int(pm_minor)) < (3, 7):
             kwargs.setdefault('nuts_kwargs', {'target_accept': 0.90})
         else:
             kwargs.setdefault('target_accept', 0.9)
+
+        # Run one chain per usable CPU core in parallel (but at least two
+        #  chains); pass cores=1 to sample two chains sequentially.
+        if hasattr(os, 'sched_getaffinity'):
+            n_cores = len(os.sched_getaffinity(0))
+        else:
+            n_cores = os.cpu_count() or 1
+        kwargs.setdefault('cores', n_cores)
+        kwargs.setdefault('chains', max(2, kwargs['cores'] or n_cores))
+        # (PyMC3 picks forkserver on macOS, where forking is unsafe.)
+        if sys.platform.startswith('linux') and (int(pm_major), int(pm_minor)) >= (3, 8):
+            kwargs.setdefault('mp_ctx', 'fork')
+
         max_rounds = 2
         for r in range(max_rounds):
             with self.model:
@@ -76,45 +117,122 @@ class BestModel(ABC):
                 break
             else:
                 if r == 0:
-                    kwargs['tune'] = 2000
+                    # Continue from where the first round ended, rather than
+                    #  discarding its adaptation and tuning again from scratch.
+                    nuts_kwargs = kwargs.pop('nuts_kwargs', {})
+                    target_accept = kwargs.pop('target_accept', nuts_kwargs.get('target_accept', 0.9))
+                    for key, value in self._warm_start(trace, target_accept).items():
+                        kwargs.setdefault(key, value)
                     print('\nDue to potentially incorrect estimates, rerunning sampling '
-                          'with {} tuning samples.\n'.format(kwargs['tune']), file=sys.stderr)
+                          'with {} tuning samples, continuing from the first run.\n'.format(kwargs['tune']),
+                          file=sys.stderr)
                 else:
                     print('\nThe samples maybe are still not totally okay. '
                           'Try rerunning the analysis.')
 
         return trace
 
+    def _warm_start(self, trace: MultiTrace, target_accept: float) -> dict:
+        """Return arguments of pm.sample that continue sampling from a trace
+
+        Each chain starts from its last sample, the diagonal mass matrix
+        of NUTS is adapted further from the posterior mean and variance, and
+        the step size is adapted further from the one tuned for the trace.
+        """
+        model = self.model
+        names = [var.name for var in model.vars]
+        mean = model.dict_to_array({name: np.mean(trace[name], axis=0) for name in names})
+        var = model.dict_to_array({name: np.var(trace[name], axis=0) for name in names})
+        var[var == 0] = 1
+        potential = quadpotential.QuadPotentialDiagAdapt(model.ndim, mean, var, 50)
+        # NUTS divides step_scale by ndim ** 0.25 to get the step size.
+        step_size = np.mean([trace.get_sampler_stats('step_size_bar', chains=chain)[-1]
+                             for chain in trace.chains])
+        with model:
+            step = pm.NUTS(potential=potential, target_accept=target_accept,
+                           step_scale=step_size * model.ndim ** 0.25)
+
+        start = [{name: trace.point(-1, chain=chain)[name] for name in names}
+                 for chain in trace.chains]
+
+        return {'step': step, 'start': start}
+
+    def _sample_numpyro(self, n_samples: int, **kwargs) -> MultiTrace:
+        try:
+            from pymc3.sampling_jax import sample_numpyro_nuts
+        except ImportError as e:
+            raise ImportError("The 'numpyro' backend requires pymc3.sampling_jax, which is "
+                              "included only in PyMC3 3.10.x and 3.11.0 to 3.11.2, "
+                              "as well as the jax and numpyro packages") from e
+
+        # Arguments of pm.sample and their counterparts in sample_numpyro_nuts
+        supported_args = {'tune': 'tune',
+                          'chains': 'chains',
+                          'target_accept': 'target_accept',
+                          'random_seed': 'random_seed',
+                          'progressbar': 'progress_bar'}
+        unsupported_args = set(kwargs) - set(supported_args)
+        if unsupported_args:
+            raise TypeError("Arguments not supported by the 'numpyro' backend: %s"
+                            % ', '.join(sorted(unsupported_args)))
+
+        kwargs = {supported_args[key]: value for key, value in kwargs.items()}
+        kwargs.setdefault('chains', 4)
+        kwargs.setdefault('target_accept', 0.9)
+        # Since PyMC3 3.11.1, the transformed free variables are dropped
+        #  from the results unless asked for.
+        if 'keep_untransformed' in inspect.signature(sample_numpyro_nuts).parameters:
+            kwargs['keep_untransformed'] = True
+        with self.model:
+            idata = sample_numpyro_nuts(draws=n_samples, **kwargs)
+
+        # The JAX sampler records only the free variables, so the trace of
+        #  every variable is rebuilt from them, chain by chain.
+        posterior = idata.posterior
+        values = {var.name: posterior[var.name].values for var in self.model.vars}
+        straces = []
+        for chain in range(posterior.sizes['chain']):
+            strace = NDArray(model=self.model)
+            strace.setup(posterior.sizes['draw'], chain)
+            for draw in range(posterior.sizes['draw']):
+                strace.record({name: var_values[chain, draw] for name, var_values in values.items()})
+            strace.close()
+            straces.append(strace)
+
+        return MultiTrace(straces)
+
 
 class BestModelOne(BestModel):
     """Model for a single-group analysis; subclass of :class:`BestModel`"""
 
     def __init__(self, y, ref_val):
-        self.y = y = np.array(y)
+        self.y = y = np.array(y, dtype=theano.config.floatX)
         self.ref_val = ref_val
 
         assert y.ndim == 1
 
+        y_std = np.std(y)
+
         self.mu_loc = mu_loc = np.mean(y)
-        self.mu_scale = mu_scale = np.std(y) * 1000
+        self.mu_scale = mu_scale = y_std * 1000
 
-        self.sigma_low = sigma_low = np.std(y) / 1000
-        self.sigma_high = sigma_high = np.std(y) * 1000
+        self.sigma_low = sigma_low = y_std / 1000
+        self.sigma_high = sigma_high = y_std * 1000
 
         self.nu_min = nu_min = 2.5
         self.nu_mean = nu_mean = 30
         self._nu_param = nu_mean - nu_min
 
+        log_sigma_low = float(np.log(sigma_low))
+        log_sigma_high = float(np.log(sigma_high))
+
         with pm.Model() as self._model:
             mean = pm.Normal('Mean', mu=mu_loc, sd=mu_scale)
-            logsigma = pm.Uniform('Log sigma', lower=np.log(sigma_low), upper=np.log(sigma_high))
+            logsigma = pm.Uniform('Log sigma', lower=log_sigma_low, upper=log_sigma_high)
             sigma = pm.Deterministic('Sigma', np.exp(logsigma))
             prec = sigma ** (-2)
-            nu = pm.Exponential('nu - %g' % nu_min, 1 / (nu_mean - nu_min)) + nu_min
-            _ = pm.Deterministic('Normality', nu)
+            nu = _add_nu_prior(nu_min, nu_mean)
             _ = pm.StudentT('Data', observed=y, nu=nu, mu=mean, lam=prec)
-            stddev = pm.Deterministic('SD', sigma * (nu / (nu - 2)) ** 0.5)
-            _ = pm.Deterministic('Effect size', (mean - ref_val) / stddev)
 
     @property
     def version(self):
@@ -145,24 +263,34 @@ class BestModelTwo(BestModel):
     """Model for a two-group analysis; subclass of :class:`BestModel`"""
 
     def __init__(self, y1, y2):
-        self.y1 = y1 = np.array(y1)
-        self.y2 = y2 = np.array(y2)
+        self.y1 = y1 = np.array(y1, dtype=theano.config.floatX)
+        self.y2 = y2 = np.array(y2, dtype=theano.config.floatX)
 
         assert y1.ndim == 1
         assert y2.ndim == 1
 
-        y_all = np.concatenate((y1, y2))
+        # Mean and standard deviation of the pooled data,
+        #  combined from the statistics of the two groups
+        n1, n2 = y1.size, y2.size
+        n = n1 + n2
+        m1, m2 = y1.mean(), y2.mean()
+        v1, v2 = y1.var(), y2.var()
+        delta = m1 - m2
+        y_all_std = np.sqrt((n1 * v1 + n2 * v2) / n + n1 * n2 * delta * delta / (n * n))
 
-        self.mu_loc = mu_loc = np.mean(y_all)
-        self.mu_scale = mu_scale = np.std(y_all) * 1000
+        self.mu_loc = mu_loc = (n1 * m1 + n2 * m2) / n
+        self.mu_scale = mu_scale = y_all_std * 1000
 
-        self.sigma_low = sigma_low = np.std(y_all) / 1000
-        self.sigma_high = sigma_high = np.std(y_all) * 1000
+        self.sigma_low = sigma_low = y_all_std / 1000
+        self.sigma_high = sigma_high = y_all_std * 1000
 
         self.nu_min = nu_min = 2.5
         self.nu_mean = nu_mean = 30
         self._nu_param = nu_mean - nu_min
 
+        log_sigma_low = float(np.log(sigma_low))
+        log_sigma_high = float(np.log(sigma_high))
+
         with pm.Model() as self._model:
             # Note: the IDE might give a warning for these because it thinks
             #  distributions like pm.Normal() don't have a string "name" argument,
@@ -171,14 +299,13 @@ class BestModelTwo(BestModel):
             group1_mean = pm.Normal('Group 1 mean', mu=mu_loc, sd=mu_scale)
             group2_mean = pm.Normal('Group 2 mean', mu=mu_loc, sd=mu_scale)
 
-            nu = pm.Exponential('nu - %g' % nu_min, 1 / (nu_mean - nu_min)) + nu_min
-            _ = pm.Deterministic('Normality', nu)
+            nu = _add_nu_prior(nu_min, nu_mean)
 
             group1_logsigma = pm.Uniform(
-                'Group 1 log sigma', lower=np.log(sigma_low), upper=np.log(sigma_high)
+                'Group 1 log sigma', lower=log_sigma_low, upper=log_sigma_high
             )
             group2_logsigma = pm.Uniform(
-                'Group 2 log sigma', lower=np.log(sigma_low), upper=np.log(sigma_high)
+                'Group 2 log sigma', lower=log_sigma_low, upper=log_sigma_high
             )
             group1_sigma = pm.Deterministic('Group 1 sigma', np.exp(group1_logsigma))
             group2_sigma = pm.Deterministic('Group 2 sigma', np.exp(group2_logsigma))
@@ -186,18 +313,9 @@ class BestModelTwo(BestModel):
             lambda1 = group1_sigma ** (-2)
             lambda2 = group2_sigma ** (-2)
 
-            group1_sd = pm.Deterministic('Group 1 SD', group1_sigma * (nu / (nu - 2)) ** 0.5)
-            group2_sd = pm.Deterministic('Group 2 SD', group2_sigma * (nu / (nu - 2)) ** 0.5)
-
             _ = pm.StudentT('Group 1 data', observed=y1, nu=nu, mu=group1_mean, lam=lambda1)
             _ = pm.StudentT('Group 2 data', observed=y2, nu=nu, mu=group2_mean, lam=lambda2)
 
-            diff_of_means = pm.Deterministic('Difference of means', group1_mean - group2_mean)
-            _ = pm.Deterministic('Difference of SDs', group1_sd - group2_sd)
-            _ = pm.Deterministic(
-                'Effect size', diff_of_means / np.sqrt((group1_sd ** 2 + group2_sd ** 2) / 2)
-            )
-
     @property
     def version(self):
         return 'v2'
@@ -230,9 +348,41 @@ class BestModelTwo(BestModel):
 
 class BestResults(ABC):
     """Results of an analysis"""
+
+    # Variables calculated from the trace after sampling; see _derive()
+    _derived_var_names = ()
+
     def __init__(self, model: BestModel, trace: MultiTrace):
         self._model = model
         self._trace = trace
+        self._init_caches()
+
+    def _init_caches(self):
+        # Indexing a MultiTrace concatenates the chains on every access,
+        #  so the samples of every variable are copied out once, as a
+        #  (chains, draws) array. A dict trace is taken to be one chain.
+        if isinstance(self._trace, MultiTrace):
+            self._var_names = [name for name in self._trace.varnames
+                               if not pm.util.is_transformed_name(name)]
+            self._raw = {name: np.ascontiguousarray(self._trace.get_values(name, combine=False))
+                         for name in self._trace.varnames}
+        else:
+            self._var_names = list(self._trace)
+            self._raw = {name: np.ascontiguousarray(np.atleast_2d(values))
+                         for name, values in self._trace.items()}
+        self._samples_cache = {}
+        self._sorted_cache = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_raw']
+        del state['_samples_cache']
+        del state['_sorted_cache']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_caches()
 
     @property
     def model(self):
@@ -254,6 +404,54 @@ class BestResults(ABC):
         """
         return self.model.observed_data(group_id)
 
+    def __getitem__(self, var_name: str) -> np.ndarray:
+        """Return the posterior samples of a variable
+
+        Besides the variables recorded in the trace, this includes the
+        standard deviations, effect size and differences, which are
+        calculated from the recorded variables after sampling.
+        """
+        return self._chains(var_name).reshape(-1)
+
+    def _chains(self, var_name: str) -> np.ndarray:
+        """Return the posterior samples of a variable as a (chains, draws) array"""
+        values = self._raw.get(var_name)
+        if values is None:
+            values = np.ascontiguousarray(self._derive(var_name, self._chains))
+            self._raw[var_name] = values
+        return values
+
+    def _derive(self, var_name: str, get):
+        """Calculate a variable not recorded in the trace
+
+        ``get`` returns the samples of other variables by name, as
+        (chains, draws) arrays. Raises KeyError for unknown variables.
+        """
+        raise KeyError(var_name)
+
+    def _samples(self, var_name: str) -> np.ndarray:
+        """Return the posterior samples of a variable for the diagnostics
+
+        Samples used more than once are stored in single precision,
+        halving the memory traffic of the diagnostics, unless that would
+        be too coarse compared to their range. The trace itself is left
+        untouched.
+        """
+        if var_name not in self._samples_cache:
+            # Converting the samples only pays off once they are reused.
+            self._samples_cache[var_name] = None
+            return self[var_name]
+
+        arr = self._samples_cache[var_name]
+        if arr is None:
+            arr = self[var_name]
+            if arr.dtype == np.float64:
+                low, high = np.min(arr), np.max(arr)
+                if max(-low, high) * np.finfo(np.float32).eps <= 1e-5 * (high - low):
+                    arr = arr.astype(np.float32)
+            self._samples_cache[var_name] = arr
+        return arr
+
     def summary(self, credible_mass: float = 0.95):
         """Return summary statistics of the results
 
@@ -265,7 +463,15 @@ class BestResults(ABC):
             For example, credible_mass=0.95 results in 95% credible intervals.
             Default: 0.95.
         """
-        return arviz.summary(self.trace, hdi_prob=credible_mass)
+        samples = {}
+        for name in self._var_names + list(self._derived_var_names):
+            if name not in samples:
+                try:
+                    samples[name] = self._chains(name)
+                except KeyError:
+                    pass
+
+        return arviz.summary(samples, hdi_prob=credible_mass)
 
     def hdi(self, var_name: str, credible_mass: float = 0.95):
         """Calculate the highest posterior density interval (HDI)
@@ -287,11 +493,32 @@ class BestResults(ABC):
         (float, float)
             The endpoints of the HPD
         """
-        az_major, az_minor, *_ = arviz.__version__.split('.')
-        if (int(az_major), int(az_minor)) >= (0, 8):
-            return tuple(arviz.hdi(self.trace[var_name], hdi_prob=credible_mass))
+        if not 0 < credible_mass <= 1:
+            raise ValueError('credible_mass must be in the interval (0, 1]')
+
+        # The HDI is the narrowest interval between two samples that contains
+        #  credible_mass * 100% of them (Chen & Shao, 1999).
+        samples = self._samples(var_name)
+        n = samples.size
+        n_in = min(int(np.floor(credible_mass * n)), n - 1)
+        n_out = n - n_in
+
+        # Candidate lower ends are the n_out smallest samples and candidate
+        #  upper ends the n_out largest ones, so only these need sorting,
+        #  unless the tails overlap or the sorted samples are at hand.
+        sorted_samples = self._sorted_cache.get(var_name)
+        if sorted_samples is None and 2 * n_out < n:
+            part = np.partition(samples, [n_out - 1, n - n_out])
+            lows = np.sort(part[:n_out])
+            highs = np.sort(part[n - n_out:])
         else:
-            return tuple(arviz.hpd(self.trace[var_name], credible_interval=credible_mass))
+            if sorted_samples is None:
+                sorted_samples = self._sorted_cache[var_name] = np.sort(samples)
+            lows = sorted_samples[:n_out]
+            highs = sorted_samples[n_in:]
+
+        min_idx = int(np.argmin(highs - lows))
+        return float(lows[min_idx]), float(highs[min_idx])
 
     def posterior_prob(self, var_name: str, low: float = -np.inf, high: float = np.inf):
         r"""Calculate the posterior probability that a variable is in a given interval
@@ -336,10 +563,18 @@ class BestResults(ABC):
 
         meaning the answer is accurate for most practical purposes.
         """
-        samples = self.trace[var_name]
-        n_match = len(samples[(low < samples) * (samples < high)])
-        n_all = len(samples)
-        return n_match / n_all
+        if low >= high:
+            return 0.0
+        if low == -np.inf and high == np.inf:
+            return 1.0
+
+        samples = self._samples(var_name)
+        if high == np.inf:
+            return float(np.mean(samples > low))
+        elif low == -np.inf:
+            return float(np.mean(samples < high))
+        else:
+            return float(np.mean((samples > low) & (samples < high)))
 
     def posterior_mode(self,
                        var_name: str):
@@ -355,20 +590,25 @@ class BestResults(ABC):
         float
             The posterior mode.
         """
-        samples = self.trace[var_name]
-
-        # calculate mode using kernel density estimate
-        kernel = st.gaussian_kde(samples)
+        samples = self._samples(var_name)
 
-        bw = kernel.covariance_factor()
+        # calculate mode using a kernel density estimate, computed by
+        #  binning the samples and convolving the histogram with a Gaussian
+        #  kernel (Silverman's rule of thumb for the bandwidth)
+        bw = 1.06 * np.std(samples) * samples.size ** (-1 / 5)
         cut = 3 * bw
-        x_low = np.min(samples) - cut * bw
-        x_high = np.max(samples) + cut * bw
+        x_low = np.min(samples) - cut
+        x_high = np.max(samples) + cut
         n = 512
-        x = np.linspace(x_low, x_high, n)
-        vals = kernel.evaluate(x)
+        counts, edges = np.histogram(samples, bins=n, range=(x_low, x_high))
+        sigma_bins = bw / ((x_high - x_low) / n)
+        # The kernel is negligible beyond 4 bandwidths, and it must not be
+        #  longer than the histogram for 'same' mode to keep n values.
+        half_width = min(int(np.ceil(4 * sigma_bins)), (n - 1) // 2)
+        kernel = np.exp(-0.5 * (np.arange(-half_width, half_width + 1) / sigma_bins) ** 2)
+        vals = np.convolve(counts, kernel, mode='same')
         max_idx = np.argmax(vals)
-        mode_val = x[max_idx]
+        mode_val = (edges[max_idx] + edges[max_idx + 1]) / 2
 
         return mode_val
 
@@ -376,16 +616,46 @@ class BestResults(ABC):
 class BestResultsOne(BestResults):
     """Results of a two-group analysis; subclass of :class:`BestResults`"""
 
+    _derived_var_names = ('SD', 'Effect size')
+
     def __init__(self, model: BestModelOne, trace: MultiTrace):
         super().__init__(model, trace)
 
+    def _derive(self, var_name: str, get):
+        if var_name == 'SD':
+            return get('Sigma') * _sd_factor(get('Normality'))
+        elif var_name == 'Effect size':
+            return (get('Mean') - self.model.ref_val) / get('SD')
+        else:
+            return super()._derive(var_name, get)
+
 
 class BestResultsTwo(BestResults):
     """Results of a two-group analysis; subclass of :class:`BestResults`"""
 
+    _derived_var_names = ('Group 1 SD',
+                          'Group 2 SD',
+                          'Difference of means',
+                          'Difference of SDs',
+                          'Effect size')
+
     def __init__(self, model: BestModelTwo, trace: MultiTrace):
         super().__init__(model, trace)
 
+    def _derive(self, var_name: str, get):
+        if var_name == 'Group 1 SD':
+            return get('Group 1 sigma') * _sd_factor(get('Normality'))
+        elif var_name == 'Group 2 SD':
+            return get('Group 2 sigma') * _sd_factor(get('Normality'))
+        elif var_name == 'Difference of means':
+            return get('Group 1 mean') - get('Group 2 mean')
+        elif var_name == 'Difference of SDs':
+            return get('Group 1 SD') - get('Group 2 SD')
+        elif var_name == 'Effect size':
+            return get('Difference of means') / np.sqrt((get('Group 1 SD') ** 2 + get('Group 2 SD') ** 2) / 2)
+        else:
+            return super()._derive(var_name, get)
+
     def observed_data(self, group_id):
         return self.model.observed_data(group_id)
 
@@ -419,6 +689,9 @@ def analyze_two(group1_data,
 
             best.analyze_two(group1_data, group2_data, tune=2000)
 
+        Passing ``backend='numpyro'`` samples with the JAX-based NumPyro
+        NUTS sampler instead (see :meth:`BestModel.sample`).
+
     Returns
     -------
     BestResultsTwo
@@ -476,6 +749,9 @@ def analyze_one(group_data,
 
             best.analyze_one(group_data, tune=2000)
 
+        Passing ``backend='numpyro'`` samples with the JAX-based NumPyro
+        NUTS sampler instead (see :meth:`BestModel.sample`).
+
     Returns
     -------
     BestResultsOne
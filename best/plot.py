@@ -88,7 +88,7 @@ def plot_posterior(best_results: BestResults,
         ...                          color='avocado')
         >>> plt.show()
     """
-    samples = best_results.trace[var_name]
+    samples = best_results[var_name]
     samples_min, samples_max = best_results.hdi(var_name, DISPLAYED_MASS)
     samples = samples[(samples_min <= samples) * (samples <= samples_max)]
 
@@ -250,16 +250,15 @@ def plot_data_and_prediction(best_results: BestResults,
         _, ax = plt.subplots()
 
     group_data = best_results.observed_data(group_id)
-    trace = best_results.trace
 
     if isinstance(best_results, BestResultsTwo):
-        means = trace['Group %d mean' % group_id]
-        sigmas = trace['Group %d sigma' % group_id]
-        nus = trace['Normality']
+        means = best_results['Group %d mean' % group_id]
+        sigmas = best_results['Group %d sigma' % group_id]
+        nus = best_results['Normality']
     elif isinstance(best_results, BestResultsOne):
-        means = trace['Mean']
-        sigmas = trace['Sigma']
-        nus = trace['Normality']
+        means = best_results['Mean']
+        sigmas = best_results['Sigma']
+        nus = best_results['Normality']
     else:
         raise ValueError('Unknown type of best_results argument')
 
@@ -354,16 +353,14 @@ def plot_all_two(best_results: BestResultsTwo,
     """
     assert type(bins) is int, 'bins argument must be an integer.'
 
-    trace = best_results.trace
-
-    posterior_mean1 = trace['Group 1 mean']
-    posterior_mean2 = trace['Group 2 mean']
+    posterior_mean1 = best_results['Group 1 mean']
+    posterior_mean2 = best_results['Group 2 mean']
 
     posterior_means = np.concatenate((posterior_mean1, posterior_mean2))
     _, bin_edges_means = np.histogram(posterior_means, bins=bins)
 
-    posterior_std1 = trace['Group 1 SD']
-    posterior_std2 = trace['Group 2 SD']
+    posterior_std1 = best_results['Group 1 SD']
+    posterior_std2 = best_results['Group 2 SD']
 
     std1_min, std1_max = best_results.hdi('Group 1 SD', DISPLAYED_MASS)
     std2_min, std2_max = best_results.hdi('Group 2 SD', DISPLAYED_MASS)
@@ -1,3 +1,8 @@
+import pickle
+import sys
+import types
+
+import arviz
 import numpy as np
 import pytest
 
@@ -31,6 +36,18 @@ def test_hdi_ok(mock_trace):
     assert br.hdi(DUMMY_VAR_NAME, 0.95) == pytest.approx((-1.96, 1.96), abs=0.1)
 
 
+@pytest.mark.parametrize("credible_mass", [0.5, 0.95, 0.995])
+def test_hdi_matches_arviz(mock_trace, credible_mass):
+    br, _ = mock_trace
+    expected = arviz.hdi(br.trace[DUMMY_VAR_NAME], hdi_prob=credible_mass)
+    assert br.hdi(DUMMY_VAR_NAME, credible_mass) == pytest.approx(tuple(expected))
+
+
+def test_posterior_mode(mock_trace):
+    br, _ = mock_trace
+    assert br.posterior_mode(DUMMY_VAR_NAME) == pytest.approx(0, abs=0.1)
+
+
 @pytest.mark.parametrize("credible_mass", [0, 1.01])
 def test_valueerror(mock_trace, credible_mass):
     br, _ = mock_trace
@@ -39,3 +56,172 @@ def test_valueerror(mock_trace, credible_mass):
 
     with pytest.raises(ValueError):
         br.summary(credible_mass=credible_mass)
+
+
+def test_pickle_drops_samples_cache(mock_trace):
+    br, _ = mock_trace
+    br.posterior_prob(DUMMY_VAR_NAME, low=0)
+    br.hdi(DUMMY_VAR_NAME, 0.5)
+    assert DUMMY_VAR_NAME in br._samples_cache
+    assert DUMMY_VAR_NAME in br._sorted_cache
+
+    br2 = pickle.loads(pickle.dumps(br))
+    assert br2._samples_cache == {}
+    assert br2._sorted_cache == {}
+    assert br2.posterior_prob(DUMMY_VAR_NAME, low=0) == br.posterior_prob(DUMMY_VAR_NAME, low=0)
+
+
+def test_sample_invalid_backend():
+    model = best.BestModelOne([1.0, 2.0, 3.0], ref_val=0)
+    with pytest.raises(ValueError):
+        model.sample(10, backend='stan')
+
+
+def test_sample_chains_follow_cores(monkeypatch):
+    passed_args = {}
+
+    def sample(draws, **kwargs):
+        passed_args.update(kwargs)
+        return types.SimpleNamespace(report=types.SimpleNamespace(ok=True))
+
+    monkeypatch.setattr(best.model.pm, 'sample', sample)
+    model = best.BestModelOne([1.0, 2.0, 3.0], ref_val=0)
+
+    model.sample(10, cores=1)
+    assert passed_args['chains'] == 2
+
+    model.sample(10, cores=3)
+    assert passed_args['chains'] == 3
+
+
+def test_sample_numpyro(monkeypatch):
+    best_model = best.BestModelOne([1.0, 2.0, 3.0, 5.0, 4.0], ref_val=0)
+    n_chains, n_draws = 2, 50
+    passed_args = {}
+
+    def sample_numpyro_nuts(draws=1000, tune=1000, chains=4, target_accept=0.8, random_seed=10,
+                            model=None, progress_bar=True, keep_untransformed=False):
+        passed_args.update(tune=tune, chains=chains, target_accept=target_accept,
+                           progress_bar=progress_bar, keep_untransformed=keep_untransformed)
+        # Like in PyMC3 3.11.2, the results contain every unobserved variable,
+        #  but the transformed ones only if keep_untransformed is set.
+        pm_model = best_model.model
+        np.random.seed(0)
+        free = {name: value + 0.1 * np.random.randn(chains, draws)
+                for name, value in pm_model.test_point.items()}
+        compute = pm_model.fastfn(pm_model.unobserved_RVs)
+        values = np.array([[compute({name: free[name][chain, draw] for name in free})
+                            for draw in range(draws)]
+                           for chain in range(chains)])
+        return arviz.from_dict(posterior={var.name: values[:, :, i]
+                                          for i, var in enumerate(pm_model.unobserved_RVs)
+                                          if keep_untransformed or not var.name.endswith('__')})
+
+    sampling_jax = types.ModuleType('pymc3.sampling_jax')
+    sampling_jax.sample_numpyro_nuts = sample_numpyro_nuts
+    monkeypatch.setitem(sys.modules, 'pymc3.sampling_jax', sampling_jax)
+
+    trace = best_model.sample(n_draws, backend='numpyro', chains=n_chains, progressbar=False)
+    assert passed_args == {'tune': 1000, 'chains': n_chains, 'target_accept': 0.9, 'progress_bar': False,
+                           'keep_untransformed': True}
+    assert trace.nchains == n_chains
+    assert len(trace) == n_draws
+    assert trace['Normality'] == pytest.approx(np.exp(trace['nu - 2.5_log__']) + 2.5)
+
+    br = best.BestResultsOne(best_model, trace)
+    assert not np.isnan(br.summary().loc['Effect size', 'r_hat'])
+
+    with pytest.raises(TypeError):
+        best_model.sample(n_draws, backend='numpyro', cores=2)
+
+
+def test_model_two_pooled_stats():
+    np.random.seed(0)
+    y1 = np.random.randn(30) * 2 + 5
+    y2 = np.random.randn(45) + 1
+    y_all = np.concatenate((y1, y2))
+
+    model = best.BestModelTwo(y1, y2)
+    assert model.mu_loc == pytest.approx(np.mean(y_all))
+    assert model.mu_scale == pytest.approx(np.std(y_all) * 1000)
+    assert model.sigma_low == pytest.approx(np.std(y_all) / 1000)
+    assert model.sigma_high == pytest.approx(np.std(y_all) * 1000)
+
+
+def test_models_are_independent():
+    model1 = best.BestModelOne([1.0, 2.0, 3.0], ref_val=0)
+    model2 = best.BestModelOne([101.0, 102.0, 104.0], ref_val=100)
+    assert model1.model is not model2.model
+    assert model1.model.test_point['Mean'] == pytest.approx(2)
+    assert model1.model['Data'].observations == pytest.approx([1, 2, 3])
+
+
+def test_samples_precision():
+    np.random.seed(0)
+    br = best.model.BestResultsOne(None, {'Small': np.random.randn(100),
+                                          'Offset': 1e6 + np.random.randn(100) * 1e-2})
+    assert br._samples('Small').dtype == np.float64
+    assert br._samples('Small').dtype == np.float32
+    assert br._samples('Offset').dtype == np.float64
+    assert br._samples('Offset').dtype == np.float64
+
+
+def test_derived_vars_two():
+    np.random.seed(0)
+    S = 1000
+    trace = {'Group 1 mean': np.random.randn(S) + 1,
+             'Group 2 mean': np.random.randn(S),
+             'Group 1 sigma': np.random.rand(S) + 1,
+             'Group 2 sigma': np.random.rand(S) + 1,
+             'Normality': np.random.rand(S) * 10 + 2.5}
+    br = best.model.BestResultsTwo(None, trace)
+
+    sd1 = trace['Group 1 sigma'] * np.sqrt(trace['Normality'] / (trace['Normality'] - 2))
+    sd2 = trace['Group 2 sigma'] * np.sqrt(trace['Normality'] / (trace['Normality'] - 2))
+    diff_of_means = trace['Group 1 mean'] - trace['Group 2 mean']
+    assert br['Group 1 SD'] == pytest.approx(sd1)
+    assert br['Difference of means'] == pytest.approx(diff_of_means)
+    assert br['Difference of SDs'] == pytest.approx(sd1 - sd2)
+    assert br['Effect size'] == pytest.approx(diff_of_means / np.sqrt((sd1 ** 2 + sd2 ** 2) / 2))
+    assert 'Effect size' in br.summary().index
+
+    with pytest.raises(KeyError):
+        br['Nonexistent']
+
+
+def test_model_data_dtype():
+    model = best.BestModelTwo([101, 100, 102], [99, 101, 100, 97])
+    assert np.issubdtype(model.observed_data(1).dtype, np.floating)
+    assert np.issubdtype(model.observed_data(2).dtype, np.floating)
+
+
+def test_model_copies_data():
+    y = np.array([1.0, 2.0, 3.0])
+    model = best.BestModelOne(y, ref_val=0)
+    y[0] = 100
+    assert model.observed_data(1)[0] == 1
+
+    with pytest.raises(AssertionError):
+        best.BestModelOne(1.0, ref_val=0)
+
+
+def test_sample_reruns_from_first_round(monkeypatch, capsys):
+    from pymc3.backends.report import SamplerReport
+
+    n_checks = []
+    monkeypatch.setattr(SamplerReport, 'ok', property(lambda self: n_checks.append(1) or len(n_checks) > 1))
+
+    model = best.BestModelOne([1.0, 2.0, 3.0, 5.0, 4.0], ref_val=0)
+    trace = model.sample(100, tune=100, cores=1, chains=2, progressbar=False)
+    assert len(n_checks) == 2
+    assert len(trace) == 100
+    assert 'with 100 tuning samples' in capsys.readouterr().err
+
+
+def test_warm_start_keeps_step_size():
+    model = best.BestModelOne([1.0, 2.0, 3.0, 5.0, 4.0], ref_val=0)
+    trace = model.sample(100, tune=100, cores=1, chains=2, progressbar=False)
+    step = model._warm_start(trace, 0.9)['step']
+
+    step_size_bar = [trace.get_sampler_stats('step_size_bar', chains=chain)[-1] for chain in trace.chains]
+    assert step.step_size == pytest.approx(np.mean(step_size_bar))
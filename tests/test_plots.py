@@ -105,3 +105,8 @@ def test_plot_posterior(data_dir):
     # Check that plotting doesn’t raise any exceptions
     ax = best.plot_posterior(best_out, 'Mean')
     ax.get_figure().savefig(os.path.join(data_dir, 'plot_posterior.pdf'))
+
+
+def test_plot_module_access():
+    assert best.plot.plot_all is best.plot_all
+    assert 'plot' in dir(best)